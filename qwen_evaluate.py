@@ -5,11 +5,19 @@ import pathlib
 import time
 import re
 import ast
+import copy
 import subprocess
+import statistics
+import hashlib
+import math
+import shutil
+from importlib import metadata
 
+import numpy as np
 import torch
-from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor, BitsAndBytesConfig
+from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor, BitsAndBytesConfig, BatchFeature
 from qwen_vl_utils import process_vision_info
+from qwen_vl_utils import vision_process
 
 PROMPT_FOR_EVALUATION = """
 ROLE: You are an expert Accessibility Consultant specializing in the quality assurance of audio description (AD) for video content.
@@ -70,16 +78,41 @@ def standardize_video_for_processing(input_path: str) -> str:
         print(f"ffmpeg failed to convert {input_path}: {e.stderr.decode()}. Using original path.")
         return input_path
 
-def create_video_chunk(video_path: str, start_time: float, duration: float, output_path: str) -> bool:
-    """Create a video chunk using ffmpeg."""
-    command = [
-        "ffmpeg", "-y", "-loglevel", "error", 
-        "-i", video_path,
-        "-ss", str(start_time),
-        "-t", str(duration),
-        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-an",
-        output_path
-    ]
+def create_video_chunk(video_path: str, start_time: float, duration: float, output_path: str,
+                       target: dict = None) -> bool:
+    """Create a video chunk using ffmpeg.
+
+    With a `target` from `get_chunk_target`, the chunk is seeked on input, scaled and
+    frame-rate reduced to what the Qwen processor will sample, and encoded with a fast preset.
+    Without one, it is cut at the source resolution and frame rate.
+    """
+    if target is None:
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error", 
+            "-i", video_path,
+            "-ss", str(start_time),
+            "-t", str(duration),
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-an",
+            output_path
+        ]
+    else:
+        filters = []
+        if target.get("fps"):
+            filters.append(f"fps={target['fps']}")
+        if target.get("width") and target.get("height"):
+            filters.append(f"scale={target['width']}:{target['height']}:flags=bicubic")
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-ss", str(start_time),
+            "-i", video_path,
+            "-t", str(duration),
+        ]
+        if filters:
+            command += ["-vf", ",".join(filters)]
+        command += [
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-an",
+            output_path
+        ]
     try:
         subprocess.run(command, check=True, capture_output=True)
         return True
@@ -100,6 +133,261 @@ def get_video_duration(video_path: str) -> float:
         print(f"Could not determine duration for {video_path}")
         return 0.0
 
+def get_video_stream_info(video_path: str) -> dict:
+    """Get width, height and frame rate of the first video stream using ffprobe."""
+    command = [
+        "ffprobe", "-v", "quiet", "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,avg_frame_rate", "-of", "json", video_path
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        stream = json.loads(result.stdout)["streams"][0]
+        num, _, den = stream["avg_frame_rate"].partition("/")
+        fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+        return {"width": int(stream["width"]), "height": int(stream["height"]), "fps": fps}
+    except (subprocess.CalledProcessError, ValueError, KeyError, IndexError):
+        print(f"Could not determine stream info for {video_path}")
+        return None
+
+def get_processor_video_limits(processor) -> dict:
+    """Collect the frame sampling and pixel limits process_vision_info applies to videos.
+
+    Patch geometry comes from the processor config; defaults that qwen_vl_utils does not
+    expose on the processor are read from its module constants, whose names vary by version.
+    """
+    image_processor = processor.image_processor
+    factor = image_processor.patch_size * image_processor.merge_size
+    if hasattr(vision_process, "VIDEO_MAX_PIXELS"):
+        min_pixels = vision_process.VIDEO_MIN_PIXELS
+        max_pixels = vision_process.VIDEO_MAX_PIXELS
+    else:
+        min_pixels = vision_process.VIDEO_MIN_TOKEN_NUM * factor * factor
+        max_pixels = vision_process.VIDEO_MAX_TOKEN_NUM * factor * factor
+    if hasattr(vision_process, "VIDEO_TOTAL_PIXELS"):
+        total_pixels = vision_process.VIDEO_TOTAL_PIXELS
+    else:
+        total_pixels = vision_process.MODEL_SEQ_LEN * factor * factor * 0.9
+    # The processor resizes again within its own bounds, so the tighter limit wins
+    video_processor = getattr(processor, "video_processor", None) or image_processor
+    processor_max_pixels = getattr(video_processor, "max_pixels", None)
+    if processor_max_pixels:
+        max_pixels = min(max_pixels, processor_max_pixels)
+    return {
+        "factor": factor,
+        "frame_factor": vision_process.FRAME_FACTOR,
+        "fps": vision_process.FPS,
+        "min_frames": vision_process.FPS_MIN_FRAMES,
+        "max_frames": vision_process.FPS_MAX_FRAMES,
+        "min_pixels": min_pixels,
+        "max_pixels": max_pixels,
+        "total_pixels": total_pixels,
+    }
+
+def get_chunk_target(limits: dict, stream_info: dict, duration: float) -> dict:
+    """Compute the frame rate and frame size process_vision_info will actually use for a chunk.
+
+    Returns None when the source already is at or below those limits.
+    """
+    if not stream_info or duration <= 0:
+        return None
+    source_fps = stream_info["fps"] or limits["fps"]
+    # Keep at least min_frames so short trailing chunks still sample correctly; the half-frame
+    # margin and rounding up keep ffmpeg's fps filter from emitting one frame too few
+    fps = max(limits["fps"], (limits["min_frames"] + 0.5) / duration)
+    fps = min(fps, limits["max_frames"] / duration)
+    fps = min(math.ceil(fps * 1000) / 1000, source_fps)
+    nframes = max(limits["frame_factor"], math.floor(duration * fps / limits["frame_factor"]) * limits["frame_factor"])
+
+    min_pixels = limits["min_pixels"]
+    max_pixels = max(min(limits["max_pixels"], limits["total_pixels"] / nframes * limits["frame_factor"]),
+                     int(min_pixels * 1.05))
+    height, width = vision_process.smart_resize(
+        stream_info["height"], stream_info["width"],
+        factor=limits["factor"], min_pixels=min_pixels, max_pixels=max_pixels
+    )
+
+    target = {}
+    if fps < source_fps:
+        target["fps"] = fps
+    # Never upscale on encode; the processor upsamples small frames itself
+    if height * width < stream_info["height"] * stream_info["width"]:
+        target["width"], target["height"] = width, height
+    return target or None
+
+def measure_chunk_preprocessing(video_path: str, start_time: float, duration: float, output_path: str,
+                                target: dict) -> tuple:
+    """Time chunk extraction and vision preprocessing for one extraction path.
+
+    Returns the timings and the `process_vision_info` output so the caller can reuse it,
+    or (None, None) when the chunk could not be cut. A decode failure yields a partial
+    report with `decode_error` set rather than raising.
+    """
+    start = time.perf_counter()
+    if not create_video_chunk(video_path, start_time, duration, output_path, target):
+        return None, None
+    stats = {
+        "bytes": os.path.getsize(output_path),
+        "encode_seconds": round(time.perf_counter() - start, 3),
+        "decode_seconds": None,
+    }
+
+    start = time.perf_counter()
+    messages = [{"role": "user", "content": [{"type": "video", "video": output_path}]}]
+    try:
+        image_inputs, video_inputs, _ = process_vision_info([messages], return_video_kwargs=True)
+    except Exception as e:
+        print(f"Could not decode {output_path} for the savings report: {e}")
+        stats["decode_error"] = str(e)
+        return stats, None
+    stats["decode_seconds"] = round(time.perf_counter() - start, 3)
+    return stats, (image_inputs, video_inputs)
+
+def hash_video_file(video_path: str) -> str:
+    """Hash the video contents so cache entries survive renames and re-runs."""
+    digest = hashlib.sha256()
+    with open(video_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class VisionCache:
+    """On-disk cache of preprocessed video tensors, shared across input types.
+
+    Each entry is a directory holding `pixel_values_videos.npy`, `video_grid_thw.npy`
+    and `meta.json`. Pixel values are stored as bfloat16 bit patterns, the dtype the vision
+    tower casts them to anyway. Arrays are memory-mapped on load, and entries are evicted
+    least-recently-used first once the cache exceeds `max_bytes`.
+    """
+
+    ARRAY_KEYS = ("pixel_values_videos", "video_grid_thw")
+    VISION_PROCESS_SETTINGS = (
+        "FPS", "FRAME_FACTOR", "FPS_MIN_FRAMES", "FPS_MAX_FRAMES", "VIDEO_MIN_PIXELS", "VIDEO_MAX_PIXELS",
+        "VIDEO_TOTAL_PIXELS", "VIDEO_MIN_TOKEN_NUM", "VIDEO_MAX_TOKEN_NUM", "MODEL_SEQ_LEN",
+    )
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, video_hash: str, start_time: float, duration: float, processor, sampling: dict) -> str:
+        """Key an entry by video content, chunk window and every parameter that shapes the tensors."""
+        image_processor = processor.image_processor
+        try:
+            qwen_vl_utils_version = metadata.version("qwen-vl-utils")
+        except metadata.PackageNotFoundError:
+            qwen_vl_utils_version = "unknown"
+        key_data = {
+            "video_hash": video_hash,
+            "start_time": round(start_time, 3),
+            "duration": round(duration, 3),
+            "sampling": sampling,
+            "qwen_vl_utils": qwen_vl_utils_version,
+            "patch_size": getattr(image_processor, "patch_size", None),
+            "temporal_patch_size": getattr(image_processor, "temporal_patch_size", None),
+            "merge_size": getattr(image_processor, "merge_size", None),
+            "min_pixels": getattr(image_processor, "min_pixels", None),
+            "max_pixels": getattr(image_processor, "max_pixels", None),
+            # qwen_vl_utils reads these limits from the environment at import time
+            "vision_process": {name: getattr(vision_process, name, None) for name in self.VISION_PROCESS_SETTINGS},
+            # decord, torchvision and torchcodec decode to slightly different pixels
+            "video_reader_backend": vision_process.get_video_reader_backend(),
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def contains(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self._entry_dir(key), "meta.json"))
+
+    def load(self, key: str) -> dict:
+        """Return the cached vision inputs as tensors backed by memory-mapped files, or None."""
+        entry_dir = self._entry_dir(key)
+        if not self.contains(key):
+            return None
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            # Copy-on-write mapping: torch shares the pages without reading the whole file.
+            vision_inputs = {
+                name: torch.from_numpy(np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode='c'))
+                for name in self.ARRAY_KEYS
+            }
+            # numpy has no bfloat16, so those arrays are saved as int16 views of the same bits
+            for name, dtype in meta.get("dtypes", {}).items():
+                if dtype == "bfloat16":
+                    vision_inputs[name] = vision_inputs[name].view(torch.bfloat16)
+            os.utime(entry_dir)
+        except (OSError, ValueError) as e:
+            print(f"Discarding unreadable vision cache entry {key}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        if meta.get("second_per_grid_ts") is not None:
+            vision_inputs["second_per_grid_ts"] = meta["second_per_grid_ts"]
+        return vision_inputs
+
+    def store(self, key: str, vision_inputs: dict):
+        """Write an entry atomically, then evict old entries to stay within budget."""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            os.makedirs(tmp_dir)
+            dtypes = {}
+            for name in self.ARRAY_KEYS:
+                tensor = vision_inputs[name].cpu()
+                if tensor.is_floating_point():
+                    tensor = tensor.to(torch.bfloat16).view(torch.int16)
+                    dtypes[name] = "bfloat16"
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), tensor.numpy())
+            second_per_grid_ts = vision_inputs.get("second_per_grid_ts")
+            if isinstance(second_per_grid_ts, torch.Tensor):
+                second_per_grid_ts = second_per_grid_ts.tolist()
+            with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump({"second_per_grid_ts": second_per_grid_ts, "dtypes": dtypes}, f)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            print(f"Warning: Could not write vision cache entry {key}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least-recently-used entries until the cache fits in `max_bytes`."""
+        entries = []
+        total_bytes = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(name)
+            if not os.path.isdir(entry_dir) or ".tmp" in name:
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir)
+                )
+                mtime = os.path.getmtime(entry_dir)
+            except OSError:
+                # Removed by a concurrent run while we were scanning
+                continue
+            entries.append((mtime, size, entry_dir))
+            total_bytes += size
+
+        for _, size, entry_dir in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_bytes -= size
+            print(f"Evicted vision cache entry: {os.path.basename(entry_dir)}")
+
+def build_inputs_from_cached_vision(processor, text: str, vision_inputs: dict) -> BatchFeature:
+    """Assemble model inputs from cached vision tensors, mirroring the processor's video token expansion."""
+    merge_length = processor.image_processor.merge_size ** 2
+    num_video_tokens = int(vision_inputs["video_grid_thw"][0].prod()) // merge_length
+    text = text.replace(processor.video_token, processor.video_token * num_video_tokens, 1)
+    text_inputs = processor(text=[text], padding=True, return_tensors="pt")
+    return BatchFeature(data={**text_inputs, **vision_inputs}, tensor_type="pt")
+
 def clean_and_parse_json(text: str) -> dict:
     print("--- CLEANING AND PARSING RESPONSE ---")
     if not text:
@@ -118,8 +406,82 @@ def clean_and_parse_json(text: str) -> dict:
         print(f"Failed to parse JSON with standard methods: {e}")
         return {"error": "Failed to parse model output as JSON", "raw_response": text}
 
-def process_single_chunk(messages: list, model_client: dict, chunk_index: int) -> str:
-    """Process a single video chunk and return raw response text."""
+def sample_with_shared_prefill(model, processor, inputs: BatchFeature, generation_config: dict,
+                               num_samples: int, chunk_index: int) -> list:
+    """Draw `num_samples` responses that all reuse a single prefill of the video and prompt.
+
+    The prompt is run through the model once, its KV cache is cropped to leave the last
+    prompt token for sampling, and the cache is repeated per sample so only decoding is
+    batched. Only batches followed by another batch decode on a copy; the final batch
+    expands the prompt cache itself. On CUDA OOM the number of samples decoded together
+    is halved, down to one at a time, before giving up.
+    """
+    input_ids = inputs.input_ids
+    attention_mask = inputs.attention_mask
+    prompt_len = input_ids.shape[1]
+    
+    def prefill_prompt_cache():
+        # A one-token greedy generate is the prefill; its cache holds exactly the prompt, and it
+        # leaves the model's mrope position offsets (rope_deltas) set for this prompt, which the
+        # cached continuation below reuses instead of re-reading the video grid
+        with torch.no_grad():
+            prefill = model.generate(**inputs, max_new_tokens=1, do_sample=False, return_dict_in_generate=True)
+        cache = prefill.past_key_values
+        cache.crop(prompt_len - 1)
+        return cache
+    
+    prompt_cache = prefill_prompt_cache()
+    response_texts = []
+    batch_size = num_samples
+    while len(response_texts) < num_samples:
+        remaining = num_samples - len(response_texts)
+        current = min(batch_size, remaining)
+        cache = None
+        try:
+            if prompt_cache is None:
+                # The previous final batch consumed the prompt cache before running out of memory
+                prompt_cache = prefill_prompt_cache()
+            if current == remaining:
+                # generate extends the cache in place; nothing needs the prompt cache afterwards
+                cache, prompt_cache = prompt_cache, None
+            else:
+                cache = copy.deepcopy(prompt_cache)
+            cache.batch_repeat_interleave(current)
+            with torch.no_grad():
+                output_ids = model.generate(
+                    input_ids=input_ids.repeat(current, 1),
+                    attention_mask=attention_mask.repeat(current, 1),
+                    past_key_values=cache,
+                    **generation_config
+                )
+        except torch.cuda.OutOfMemoryError:
+            del cache
+            torch.cuda.empty_cache()
+            if current == 1:
+                raise
+            batch_size = max(1, current // 2)
+            print(f"CUDA OOM sampling {current} responses for chunk {chunk_index}; retrying {batch_size} at a time")
+            continue
+        
+        generated_ids = output_ids[:, prompt_len:]
+        response_texts.extend(
+            processor.batch_decode(generated_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+        )
+        del cache, output_ids
+    
+    return response_texts
+
+def process_single_chunk(messages: list, model_client: dict, chunk_index: int,
+                         vision_cache: VisionCache = None, cache_key: str = None,
+                         num_samples: int = 1, cached_vision: dict = None, vision_info: tuple = None) -> list:
+    """Process a single video chunk and return the raw response text of each sample.
+
+    With more than one sample, the video and prompt are preprocessed and prefilled
+    once and only decoding runs per sample (see `sample_with_shared_prefill`). `cached_vision` holds tensors
+    already loaded from `vision_cache`; otherwise the video is processed from
+    the chunk file, or taken from `vision_info` when `process_vision_info` already
+    ran on it, and stored under `cache_key`.
+    """
     model = model_client['model']
     processor = model_client['processor']
     
@@ -131,15 +493,27 @@ def process_single_chunk(messages: list, model_client: dict, chunk_index: int) -
                 torch.cuda.empty_cache()
                 
             text = processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-            image_inputs, video_inputs, video_kwargs = process_vision_info([messages], return_video_kwargs=True)
             
-            inputs = processor(
-                text=[text], 
-                images=image_inputs, 
-                videos=video_inputs, 
-                padding=True,
-                return_tensors="pt"
-            ).to(model.device)
+            if cached_vision is not None:
+                print(f"Using cached vision inputs for chunk {chunk_index}")
+                inputs = build_inputs_from_cached_vision(processor, text, cached_vision)
+            else:
+                if vision_info is not None:
+                    image_inputs, video_inputs = vision_info
+                else:
+                    image_inputs, video_inputs, video_kwargs = process_vision_info([messages], return_video_kwargs=True)
+                
+                inputs = processor(
+                    text=[text], 
+                    images=image_inputs, 
+                    videos=video_inputs, 
+                    padding=True,
+                    return_tensors="pt"
+                )
+                if vision_cache and cache_key:
+                    vision_cache.store(cache_key, inputs)
+            
+            inputs = inputs.to(model.device)
             
             generation_config = {
                 "max_new_tokens": 512,
@@ -148,20 +522,29 @@ def process_single_chunk(messages: list, model_client: dict, chunk_index: int) -
                 "top_p": 0.9,
             }
             
-            with torch.no_grad():
-                output_ids = model.generate(**inputs, **generation_config)
-            
-            input_token_len = inputs.input_ids.shape[1]
-            generated_ids = output_ids[:, input_token_len:]
-            response_text = processor.batch_decode(generated_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)[0]
+            if num_samples > 1:
+                response_texts = sample_with_shared_prefill(
+                    model, processor, inputs, generation_config, num_samples, chunk_index
+                )
+            else:
+                with torch.no_grad():
+                    output_ids = model.generate(**inputs, **generation_config)
+                
+                input_token_len = inputs.input_ids.shape[1]
+                generated_ids = output_ids[:, input_token_len:]
+                response_texts = processor.batch_decode(generated_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
             
-            print(f"Got response for chunk {chunk_index}")
-            return response_text
+            print(f"Got {len(response_texts)} response(s) for chunk {chunk_index}")
+            return response_texts
 
         except torch.cuda.OutOfMemoryError as e:
             print(f"CUDA OOM error for chunk {chunk_index} (attempt {attempt + 1}): {e}")
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
+            if num_samples > 1:
+                # Keep the chunk with fewer samples rather than dropping it
+                num_samples = max(1, num_samples // 2)
+                print(f"Retrying chunk {chunk_index} with {num_samples} sample(s)")
             if attempt == max_retries - 1:
                 return None
             time.sleep(10)
@@ -174,22 +557,115 @@ def process_single_chunk(messages: list, model_client: dict, chunk_index: int) -
     
     return None
 
-def combine_chunk_responses(responses: list) -> dict:
-    """Combine multiple chunk responses into a single comprehensive evaluation."""
+def combine_chunk_responses(responses: list, parsed_responses: list = None) -> dict:
+    """Combine multiple chunk responses into a single comprehensive evaluation.
+
+    `parsed_responses` may hold already-parsed dicts aligned with `responses`; entries
+    that are None are parsed here.
+    """
     if not responses:
         return {"error": "No valid responses from chunks"}
     
     # Try to parse the first valid response as the primary evaluation
-    for response in responses:
-        parsed = clean_and_parse_json(response)
+    for i, response in enumerate(responses):
+        parsed = parsed_responses[i] if parsed_responses and parsed_responses[i] is not None else None
+        if parsed is None:
+            parsed = clean_and_parse_json(response)
         if parsed and "evaluation_summary" in parsed:
             return parsed
     
     # If no valid parse, return error
     return {"error": "Could not parse any chunk responses", "raw_responses": responses}
 
-def evaluate_video_with_qwen(video_path: str, json_data_str: str, model_client: dict) -> dict:
-    """Evaluate the entire video by processing it in chunks but combining context."""
+def parse_rating(value) -> float:
+    """Extract a numeric 1-5 rating from values like 4, "4" or "4/5"."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r'\d+(\.\d+)?', str(value))
+    return float(match.group()) if match else None
+
+def aggregate_sample_ratings(parsed_responses: list, chunk_index: int) -> dict:
+    """Summarize the criteria ratings of several parsed samples for one chunk as median and dispersion."""
+    ratings_by_criterion = {}
+    parsed_samples = 0
+    for parsed in parsed_responses:
+        criteria = parsed.get("criteria_ratings") if isinstance(parsed, dict) else None
+        if not isinstance(criteria, dict):
+            continue
+        parsed_samples += 1
+        for criterion, entry in criteria.items():
+            rating = parse_rating(entry.get("rating") if isinstance(entry, dict) else entry)
+            if rating is not None:
+                ratings_by_criterion.setdefault(criterion, []).append(rating)
+
+    criteria_stats = {}
+    for criterion, ratings in ratings_by_criterion.items():
+        criteria_stats[criterion] = {
+            "median_rating": statistics.median(ratings),
+            "std_dev": round(statistics.pstdev(ratings), 3),
+            "min_rating": min(ratings),
+            "max_rating": max(ratings),
+            "ratings": ratings,
+        }
+    return {
+        "chunk_index": chunk_index,
+        "num_samples": len(parsed_responses),
+        "parsed_samples": parsed_samples,
+        "criteria": criteria_stats,
+    }
+
+def report_chunk_savings(video_path: str, standardized: dict, start_time: float, duration: float,
+                         output_path: str, target: dict, chunk_index: int) -> tuple:
+    """Extract a chunk on the processor-matched path and compare it against the previous path.
+
+    The previous path standardized the whole video before cutting full-resolution chunks, so
+    `standardized` carries that video's path and its per-chunk share of time and bytes.
+    Returns the report and the matched chunk's `process_vision_info` output for reuse.
+    """
+    matched, vision_info = measure_chunk_preprocessing(
+        video_path, start_time, duration, output_path, target
+    )
+    if matched is None:
+        return None, None
+
+    base_name, ext = os.path.splitext(output_path)
+    legacy_path = f"{base_name}_source{ext}"
+    try:
+        legacy, _ = measure_chunk_preprocessing(
+            standardized["path"], start_time, duration, legacy_path, None
+        )
+    finally:
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+    report = {"chunk_index": chunk_index, "target": target, "matched": matched}
+    if legacy is None:
+        return report, vision_info
+
+    legacy["standardize_seconds"] = standardized["seconds_per_chunk"]
+    legacy["standardize_bytes"] = standardized["bytes_per_chunk"]
+    report["source_resolution"] = legacy
+    report["bytes_saved"] = legacy["bytes"] + legacy["standardize_bytes"] - matched["bytes"]
+    message = f"Chunk {chunk_index}: saved {report['bytes_saved'] / 1024**2:.1f} MiB"
+    if legacy["decode_seconds"] is not None and matched["decode_seconds"] is not None:
+        report["seconds_saved"] = round(
+            legacy["standardize_seconds"] + legacy["encode_seconds"] + legacy["decode_seconds"]
+            - matched["encode_seconds"] - matched["decode_seconds"], 3
+        )
+        message += f" and {report['seconds_saved']:.2f}s"
+    print(message)
+    return report, vision_info
+
+def evaluate_video_with_qwen(video_path: str, json_data_str: str, model_client: dict,
+                             vision_cache: VisionCache = None, num_samples: int = 1,
+                             match_processor: bool = True, report_savings: bool = False) -> dict:
+    """Evaluate the entire video by processing it in chunks but combining context.
+
+    The video is only cut when a chunk is missing from `vision_cache`, so repeat
+    evaluations with another input type skip all video preprocessing. With
+    `match_processor`, chunks are extracted straight from the source at the size and
+    frame rate the processor will use; otherwise the video is first standardized and
+    chunks are cut at full resolution.
+    """
     model = model_client['model']
     processor = model_client['processor']
     
@@ -198,11 +674,20 @@ def evaluate_video_with_qwen(video_path: str, json_data_str: str, model_client:
     # Get video duration
     video_duration = get_video_duration(video_path)
     chunk_duration = 30.0  # Process in 30-second chunks
+    video_hash = hash_video_file(video_path) if vision_cache else None
+    limits = get_processor_video_limits(processor) if match_processor else None
+    stream_info = get_video_stream_info(video_path) if match_processor else None
     
     all_responses = []
+    all_parsed = []
+    sampled_ratings = []
+    savings_report = []
     chunk_start = 0.0
     chunk_index = 0
     temp_files = []
+    standardized_video_path = None
+    # Per-chunk share of the standardization pass the source-resolution path pays up front
+    standardized = None
     
     try:
         while chunk_start < video_duration:
@@ -212,26 +697,78 @@ def evaluate_video_with_qwen(video_path: str, json_data_str: str, model_client:
             # Create chunk file
             chunk_filename = f"temp_chunk_{chunk_index}.mp4"
             chunk_path = os.path.join(os.path.dirname(video_path), chunk_filename)
-            temp_files.append(chunk_path)
             
             print(f"Processing chunk {chunk_index}: {chunk_start:.1f}s - {chunk_end:.1f}s")
             
-            if create_video_chunk(video_path, chunk_start, actual_duration, chunk_path):
+            target = get_chunk_target(limits, stream_info, actual_duration) if match_processor else None
+            
+            cache_key = None
+            if vision_cache:
+                cache_key = vision_cache.make_key(
+                    video_hash, chunk_start, actual_duration, processor,
+                    {"match_processor": match_processor, "target": target}
+                )
+            
+            cached_vision = vision_cache.load(cache_key) if cache_key else None
+            vision_info = None
+            if cached_vision is not None:
+                chunk_ready = True
+            elif match_processor:
+                temp_files.append(chunk_path)
+                if report_savings:
+                    if standardized is None:
+                        start = time.perf_counter()
+                        standardized_video_path = standardize_video_for_processing(video_path)
+                        num_chunks = max(1, math.ceil(video_duration / chunk_duration))
+                        standardized = {
+                            "path": standardized_video_path,
+                            "seconds_per_chunk": round((time.perf_counter() - start) / num_chunks, 3),
+                            "bytes_per_chunk": (os.path.getsize(standardized_video_path) // num_chunks
+                                                if standardized_video_path != video_path else 0),
+                        }
+                    chunk_report, vision_info = report_chunk_savings(
+                        video_path, standardized, chunk_start, actual_duration, chunk_path, target,
+                        chunk_index
+                    )
+                    chunk_ready = chunk_report is not None
+                    if chunk_report:
+                        savings_report.append(chunk_report)
+                else:
+                    chunk_ready = create_video_chunk(video_path, chunk_start, actual_duration, chunk_path, target)
+            else:
+                if standardized_video_path is None:
+                    standardized_video_path = standardize_video_for_processing(video_path)
+                temp_files.append(chunk_path)
+                chunk_ready = create_video_chunk(standardized_video_path, chunk_start, actual_duration, chunk_path)
+            
+            if chunk_ready:
                 # Process this chunk with the FULL JSON context
                 messages = [{"role": "user", "content": [
                     {"type": "text", "text": final_prompt}, 
                     {"type": "video", "video": chunk_path}
                 ]}]
                 
-                chunk_response = process_single_chunk(messages, model_client, chunk_index)
-                if chunk_response:
-                    all_responses.append(chunk_response)
+                chunk_responses = process_single_chunk(
+                    messages, model_client, chunk_index, vision_cache, cache_key, num_samples,
+                    cached_vision=cached_vision, vision_info=vision_info
+                )
+                if chunk_responses:
+                    all_responses.extend(chunk_responses)
+                    if num_samples > 1:
+                        # Parse once here; combine_chunk_responses reuses these
+                        parsed_responses = [clean_and_parse_json(response) for response in chunk_responses]
+                        all_parsed.extend(parsed_responses)
+                        sampled_ratings.append(aggregate_sample_ratings(parsed_responses, chunk_index))
+                    else:
+                        all_parsed.extend([None] * len(chunk_responses))
             
             chunk_start = chunk_end
             chunk_index += 1
     
     finally:
-        # Cleanup chunk files
+        # Cleanup chunk files and the standardized video
+        if standardized_video_path and standardized_video_path != video_path:
+            temp_files.append(standardized_video_path)
         for temp_file in temp_files:
             if os.path.exists(temp_file):
                 try:
@@ -240,12 +777,40 @@ def evaluate_video_with_qwen(video_path: str, json_data_str: str, model_client:
                     pass
     
     # Combine all chunk responses into a single evaluation
-    return combine_chunk_responses(all_responses)
+    evaluation = combine_chunk_responses(all_responses, all_parsed)
+    # Rating stability is useful even when no sample yielded a full evaluation
+    if sampled_ratings:
+        evaluation["sampled_criteria_ratings"] = sampled_ratings
+    if savings_report:
+        total_bytes = sum(r.get("bytes_saved", 0) for r in savings_report)
+        total_seconds = sum(r.get("seconds_saved", 0) for r in savings_report)
+        print(f"Chunk extraction saved {total_bytes / 1024**2:.1f} MiB and {total_seconds:.1f}s in total")
+        if "error" not in evaluation:
+            evaluation["chunk_extraction_report"] = savings_report
+    return evaluation
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 def main():
     parser = argparse.ArgumentParser(description="Evaluate audio description using Qwen with video chunking.")
     parser.add_argument("video_folder", help="Path to the folder containing the video and JSON data.")
     parser.add_argument("--input_type", required=True, help="The source of the input JSON file.")
+    parser.add_argument("--vision_cache_dir", default="../.cache/qwen_vision",
+                        help="Directory for preprocessed video tensors shared across input types.")
+    parser.add_argument("--vision_cache_max_gb", type=float, default=20.0,
+                        help="Evict least-recently-used cache entries beyond this size.")
+    parser.add_argument("--no_vision_cache", action="store_true", help="Disable the preprocessed video cache.")
+    parser.add_argument("--num_samples", type=positive_int, default=1,
+                        help="Samples drawn per chunk from one shared prefill; ratings are aggregated when > 1.")
+    parser.add_argument("--source_resolution_chunks", action="store_true",
+                        help="Cut chunks at the source resolution and frame rate instead of the processor's.")
+    parser.add_argument("--report_chunk_savings", action="store_true",
+                        help="Also run the source-resolution path per chunk and report bytes and seconds saved.")
     args = parser.parse_args()
     
     folder_path = pathlib.Path(args.video_folder)
@@ -300,25 +865,15 @@ def main():
         print(f"Failed to load Qwen model: {e}")
         return
 
-    # Standardize video and evaluate
-    standardized_video_path = None
-    
-    try:
-        standardized_video_path = standardize_video_for_processing(str(video_path))
-        
-        # Evaluate the entire video using chunked processing
-        evaluation_result = evaluate_video_with_qwen(
-            standardized_video_path, json_string_for_prompt, model_client
-        )
-    
-    finally:
-        # Cleanup standardized video
-        if standardized_video_path and standardized_video_path != str(video_path) and os.path.exists(standardized_video_path):
-            try:
-                os.remove(standardized_video_path)
-                print(f"Cleaned up: {standardized_video_path}")
-            except OSError as e:
-                print(f"Warning: Could not remove {standardized_video_path}: {e}")
+    vision_cache = None
+    if not args.no_vision_cache:
+        vision_cache = VisionCache(args.vision_cache_dir, int(args.vision_cache_max_gb * 1024**3))
+
+    # Evaluate the entire video using chunked processing; chunks are only extracted on cache misses
+    evaluation_result = evaluate_video_with_qwen(
+        str(video_path), json_string_for_prompt, model_client, vision_cache, args.num_samples,
+        match_processor=not args.source_resolution_chunks, report_savings=args.report_chunk_savings
+    )
 
     # Save results
     if evaluation_result: